@@ -1,6 +1,13 @@
 import time
+from enum import IntEnum
+from itertools import permutations
+
 import mesa
-from mesa.visualization import SolaraViz, make_space_component
+import numpy as np
+from numba import njit
+
+# the Solara visualization stack is only imported in the __main__ block below,
+# so headless users (run_simulations.py) don't pay for it at import time
 
 
 NUM_AGENTS = 15
@@ -9,6 +16,71 @@ SEED = 42
 EMERGENCY_TIME = 10
 FOLLOW_LIMIT_STEPS = 20
 
+# the four orthogonal step directions, hoisted so the hot loops never rebuild them
+DIRS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+# same directions as an array for the vectorized pre-emergency walk
+DIRS_ARR = np.array(DIRS, dtype=np.int16)
+# all 24 orderings of DIRS, so the constant walk can draw a uniformly random
+# try-order with one randrange instead of shuffling a fresh list per call
+DIR_PERMS = tuple(permutations(DIRS))
+
+
+# evac agent states as small ints so comparisons are integer equality and the
+# step dispatch is a tuple index instead of a string-compared if/elif chain
+class State(IntEnum):
+    HELP = 0
+    FOLLOWING = 1
+    EVACUATING = 2
+
+
+# JIT-compiled helpers for the per-agent hot paths. They operate on the plain
+# arrays the model maintains (exit_xy, occupancy, exit_mask) so the inner loops
+# run as machine code instead of interpreted Python.
+
+@njit(cache=True)
+def _visible_exit_idxs(x, y, exit_xy, radius):
+    # indices of the exits within `radius` (Chebyshev box) of (x, y)
+    out = np.empty(exit_xy.shape[0], dtype=np.int64)
+    n = 0
+    for i in range(exit_xy.shape[0]):
+        if abs(exit_xy[i, 0] - x) <= radius and abs(exit_xy[i, 1] - y) <= radius:
+            out[n] = i
+            n += 1
+    return out[:n]
+
+
+@njit(cache=True)
+def _closest_exit_idx(x, y, exit_xy, idxs):
+    # index (into exit_xy) of the visible exit with smallest Manhattan distance
+    best = idxs[0]
+    best_d = abs(exit_xy[best, 0] - x) + abs(exit_xy[best, 1] - y)
+    for k in range(1, idxs.shape[0]):
+        i = idxs[k]
+        d = abs(exit_xy[i, 0] - x) + abs(exit_xy[i, 1] - y)
+        if d < best_d:
+            best = i
+            best_d = d
+    return best
+
+
+@njit(cache=True)
+def _move_towards_step(x, y, tx, ty, occupancy, exit_mask):
+    # picks the first in-bounds candidate cell (x step first, then y step)
+    # that is an exit or unoccupied; returns (-1, -1) when both are blocked
+    size = occupancy.shape[0]
+    # branchless signs of the deltas: -1, 0 or +1 without conditional jumps
+    sx = (tx > x) - (tx < x)
+    sy = (ty > y) - (ty < y)
+    if sx != 0:
+        nx = x + sx
+        if 0 <= nx < size and (exit_mask[nx, y] or occupancy[nx, y] == 0):
+            return nx, y
+    if sy != 0:
+        ny = y + sy
+        if 0 <= ny < size and (exit_mask[x, ny] or occupancy[x, ny] == 0):
+            return x, ny
+    return -1, -1
+
 class MonitorAgent(mesa.Agent):
     def __init__(self, model, emergency_time_seconds):
         super().__init__(model)
@@ -17,244 +89,267 @@ class MonitorAgent(mesa.Agent):
         self.emergency_triggered = False
 
     def step(self):
-        elapsed = time.time() - self.model.start_time
+        elapsed = self.model.now - self.model.start_time
 
         # If emergency hasn’t been triggered yet and enough seconds passed, mark monitor as triggered
         if not self.emergency_triggered and elapsed >= self.emergency_time:
             self.emergency_triggered = True
+            # evac agents read this flag directly, no per-agent notification
             self.model.emergency = True
 
-            # notify all evac agents after 10 seconds
-            for agent in self.model.active_agents:
-                agent.emergency_triggered = True
-
 class ExitAgent(mesa.Agent):
     def __init__(self, model):
         super().__init__(model)
 
 class EvacAgent(mesa.Agent):
-    def __init__(self, model):
+    def __init__(self, model, idx):
         super().__init__(model)
-        self.emergency_triggered = False
         # direction is used for constant walking before emergency
         self.direction = None
 
-        self.state = "HELP"
+        # row of this agent in the model's agents_xy / agent_state arrays
+        self.idx = idx
+        self.state = State.HELP
+        # per-state step handlers, indexed by the State value; bound once here
+        self._handlers = (self._step_help, self._step_following, self._step_evacuating)
 
         # reference to the guide agent being followed.
         self.following_agent = None
         # used to stop following after 10 seconds.
         self.follow_start_step = 0
-        # dictionary to track who you recently asked
-        self.asked_memory = {}
-
-    # function used to loop over exits and see if they are in the agent radius (if they are close)
+        # maps unique_id -> step we last asked that agent (ids, not agent
+        # objects, so exited agents aren't kept alive as dict keys)
+        self.last_asked_tick = {}
+
+    # the state lives in the model's agent_state array (SoA) so model-level
+    # code can scan all states without touching the agent objects
+    @property
+    def state(self):
+        return self.model.agent_state[self.idx]
+
+    @state.setter
+    def state(self, value):
+        self.model.agent_state[self.idx] = value
+
+    # returns the indices (into model.exit_xy) of the exits inside the agent radius,
+    # computed by the JIT kernel on the cached coordinate array
     def get_visible_exits(self, radius=4):
-        visible_exits = []
         x, y = self.pos
-        for exit_agent in self.model.exits:
-            ex, ey = exit_agent.pos
-            if abs(ex - x) <= radius and abs(ey - y) <= radius:
-                visible_exits.append(exit_agent)
-        return visible_exits
-
-    # function that returns the closest exit by Manhattan distance (|dx| + |dy|).
-    # returns the exit with smallest computed distance
-    def closest_exit(self, exits):
+        return _visible_exit_idxs(x, y, self.model.exit_xy, radius)
+
+    # returns the index of the closest visible exit by Manhattan distance (|dx| + |dy|)
+    def closest_exit(self, exit_idxs):
         x, y = self.pos
-        closest = min(exits, key=lambda e: abs(e.pos[0] - x) + abs(e.pos[1] - y))
-        return closest
+        return int(_closest_exit_idx(x, y, self.model.exit_xy, exit_idxs))
 
     def move_towards(self, target_pos):
-        # computes direction deltas from current position to target
+        # the kernel picks a step closer in x or y that is in-bounds and free
+        # (or an exit); (-1, -1) means both candidates are blocked
+        model = self.model
         x, y = self.pos
-        tx, ty = target_pos
-        dx = tx - x
-        dy = ty - y
-
-        # Builds up to two candidate next positions: one step closer in x or/and one step closer in y
-        move_options = []
-        if dx != 0:
-            move_options.append((x + (1 if dx > 0 else -1), y))
-        if dy != 0:
-            move_options.append((x, y + (1 if dy > 0 else -1)))
-
-        for nx, ny in move_options:
-            # skip candidate if it’s outside the grid
-            if self.model.grid.out_of_bounds((nx, ny)):
-                continue
-
-            # Get agents currently in that cell and if the cell is empty or its an exit cell, allow moving there
-            cell_contents = self.model.grid.get_cell_list_contents((nx, ny))
-
-            if len(cell_contents) == 0 or self.is_exit_cell((nx, ny)):
-                self.model.grid.move_agent(self, (nx, ny))
-                self.check_exit()
-                return True
-
+        nx, ny = _move_towards_step(
+            x, y, target_pos[0], target_pos[1],
+            model.occupancy, model.exit_mask,
+        )
+        if nx >= 0:
+            model.move_agent_to(self, (nx, ny))
+            self.check_exit()
+            return True
         return False
 
     def pick_random_direction(self):
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        self.direction = self.random.choice(directions)
+        self.direction = DIRS[self.random.randrange(4)]
 
     # Calculate a fallback move when direct move is blocked
-    def best_free_step_towards_exit(self, exit_agent):
+    def best_free_step_towards_exit(self, exit_pos):
         x, y = self.pos
-        tx, ty = exit_agent.pos
-
-        # Get all orthogonal neighbors
-        neighbors = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
-
-        # Keep only neighbors that are inside the grid and free
-        free_neighbors = [
-            n for n in neighbors
-            if not self.model.grid.out_of_bounds(n)
-               and (len(self.model.grid.get_cell_list_contents(n)) == 0 or self.is_exit_cell(n))
-        ]
-
-        if not free_neighbors:
-            return None  # all neighbors blocked
+        tx, ty = exit_pos
+
+        # Scan the orthogonal neighbors inline, tracking the free one with the
+        # smallest Manhattan distance to the exit (no intermediate list, no
+        # lambda-keyed min in the hot loop)
+        # bind the hot model attributes to locals once for the scan
+        model = self.model
+        width = model.grid.width
+        height = model.grid.height
+        exit_positions = model.exit_positions
+        occupancy = model.occupancy
+
+        best_cell = None
+        best_dist = None
+        for n in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            # inline bounds check: the shape is fixed, no need for Mesa's
+            # general out_of_bounds call
+            if not (0 <= n[0] < width and 0 <= n[1] < height):
+                continue
+            if n in exit_positions or occupancy[n] == 0:
+                dist = abs(n[0] - tx) + abs(n[1] - ty)
+                if best_dist is None or dist < best_dist:
+                    best_cell = n
+                    best_dist = dist
 
-        # Pick the neighbor that minimizes Manhattan distance to exit
-        best_cell = min(free_neighbors, key=lambda n: abs(n[0] - tx) + abs(n[1] - ty))
+        # None when all neighbors are blocked
         return best_cell
 
     # Checks if pos equals the position of any exit
     def is_exit_cell(self, pos):
-        return any(exit_agent.pos == pos for exit_agent in self.model.exits)
+        return pos in self.model.exit_positions
 
-    # if evac agent is on an exit remove it from the grid
+    # if evac agent is on an exit remove it from the grid; the active list is
+    # only pruned after the step loop so the model can iterate it in place
     def check_exit(self):
-        for exit_agent in self.model.exits:
-            if self.pos == exit_agent.pos:
-                self.model.grid.remove_agent(self)
-                if self in self.model.active_agents:
-                    self.model.active_agents.remove(self)
-                return True
+        if self.pos in self.model.exit_positions:
+            self.model.remove_from_grid(self)
+            if self in self.model.active_agents_set:
+                self.model.active_agents_set.remove(self)
+                self.model.to_remove.append(self)
+            return True
         return False
 
     def ask_neighbors(self):
-        neighbors = self.model.grid.get_neighbors(self.pos, moore=True, radius=5, include_center=False)
-        current_time = time.time()
+        # scan the radius-5 box through the model's cell index instead of
+        # grid.get_neighbors: only cells that actually hold an evac agent are
+        # visited, and since the box is the Moore neighborhood itself every
+        # indexed cell is guaranteed in range (no distance recheck needed)
+        x, y = self.pos
+        model = self.model
+        evac_positions = model.evac_positions
+        tick = model.step_count
         COOLDOWN_STEPS = 5  # nu intrebam acelasi agent timp de 5 pasi
 
-        for neighbor in neighbors:
-            if isinstance(neighbor, EvacAgent) and neighbor in self.model.active_agents:
+        # every 64 ticks drop entries whose cooldown already expired, so the
+        # dict can't grow without bound over a long run
+        if self.last_asked_tick and tick % 64 == 0:
+            self.last_asked_tick = {
+                uid: t for uid, t in self.last_asked_tick.items()
+                if tick - t <= COOLDOWN_STEPS
+            }
+        last_asked_tick = self.last_asked_tick
+
+        for cx in range(max(0, x - 5), min(model.grid.width, x + 6)):
+            for cy in range(max(0, y - 5), min(model.grid.height, y + 6)):
+                neighbor = evac_positions.get((cx, cy))
+                if neighbor is None or neighbor is self:
+                    continue
                 # if never asked, treat last asked as step -10*9
-                last_asked_step = self.asked_memory.get(neighbor, -10**9)
-                if self.model.step_count - last_asked_step > COOLDOWN_STEPS:
+                last_asked = last_asked_tick.get(neighbor.unique_id, -10**9)
+                if tick - last_asked > COOLDOWN_STEPS:
                     # Store that we asked this neighbor now
-                    self.asked_memory[neighbor] =  self.model.step_count
+                    last_asked_tick[neighbor.unique_id] = tick
                     # If the neighbor can see an exit then he will be the guide
-                    if neighbor.get_visible_exits():
+                    if neighbor.get_visible_exits().size:
                         return neighbor
         return None
 
     def do_random_constant_move(self):
         # after emergency = constant walking
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
         if self.direction is None:
-            self.direction = self.random.choice(directions)
-
-        self.random.shuffle(directions)
+            self.direction = DIRS[self.random.randrange(4)]
 
-        # Try current direction first, then others
-        candidate_dirs = [self.direction] + [d for d in directions if d != self.direction]
+        # bind the hot model attributes to locals once for the scan
+        model = self.model
+        width = model.grid.width
+        height = model.grid.height
+        occupancy = model.occupancy
+        x, y = self.pos
 
-        for dx, dy in candidate_dirs:
-            target = (self.pos[0] + dx, self.pos[1] + dy)
+        # Try current direction first, then the others in uniformly random
+        # order (a precomputed permutation, so no shuffled list per call)
+        order = DIR_PERMS[self.random.randrange(24)]
+        for k in range(-1, 4):
+            if k < 0:
+                dx, dy = self.direction
+            else:
+                dx, dy = order[k]
+                if (dx, dy) == self.direction:
+                    continue
+            target = (x + dx, y + dy)
 
-            if self.model.grid.out_of_bounds(target):
+            # inline bounds check instead of Mesa's general out_of_bounds
+            if not (0 <= target[0] < width and 0 <= target[1] < height):
                 continue
 
-            if len(self.model.grid.get_cell_list_contents(target)) == 0:
+            if occupancy[target] == 0:
                 self.direction = (dx, dy)  # keep the direction that worked
-                self.model.grid.move_agent(self, target)
+                model.move_agent_to(self, target)
                 # If no move possible, keep direction but don't move
                 return
 
 
     def step(self):
-        # before emergency = random walking
-        if not self.emergency_triggered:
-            neighbors = self.model.grid.get_neighborhood(
-                self.pos,
-                moore=False,
-                include_center=False,
-                radius=1,
-            )
-            # get empty neighbor cells - if any, move to a random empty neighbor
-            valid = [n for n in neighbors if not self.model.grid.get_cell_list_contents(n)]
-            if valid:
-                self.model.grid.move_agent(self, self.random.choice(valid))
+        # before emergency the model random-walks everyone in one batch
+        # (see GridModel.pre_emergency_random_walk), so nothing to do here
+        if not self.model.emergency:
             return
 
         visible_exits = self.get_visible_exits()
         # if agent can see exits, change state to Evacuating and stop following anyone
-        if visible_exits:
-            self.state = "EVACUATING"
+        if visible_exits.size:
+            self.state = State.EVACUATING
             self.following_agent = None
         # If agent is following, then stop after 20 steps of following (becomes HELP again)
         # or stop if the guide already exited (no longer active)
-        if self.state == "FOLLOWING":
+        if self.state == State.FOLLOWING:
             if self.model.step_count - self.follow_start_step > FOLLOW_LIMIT_STEPS:
-                self.state = "HELP"
+                self.state = State.HELP
                 self.following_agent = None
-            elif self.following_agent not in self.model.active_agents:  # if the guide has exited
-                self.state = "HELP"
+            elif self.following_agent not in self.model.active_agents_set:  # if the guide has exited
+                self.state = State.HELP
                 self.following_agent = None
 
-        # if state is Evacuating, then move to the closest exist
-        if self.state == "EVACUATING":
-            if not visible_exits:
-                self.state = "HELP"
-                self.following_agent = None
-                self.do_random_constant_move()
-                return
-            exit_agent = self.closest_exit(visible_exits)
-            moved = self.move_towards(exit_agent.pos)
-
-            # If direct path is blocked, try the best free step towards exit
-            if not moved:
-                target_cell = self.best_free_step_towards_exit(exit_agent)
-                if target_cell:
-                    self.model.grid.move_agent(self, target_cell)
-                    self.check_exit()
-
-        # If following someone, compute distance to them
-        # if within 5 cells, move toward them
-        # if too far, give up and revert to HELP
-        elif self.state == "FOLLOWING":
-            if self.following_agent and self.following_agent.pos:
-                dist = abs(self.following_agent.pos[0] - self.pos[0]) + abs(self.following_agent.pos[1] - self.pos[1])
-
-                if dist <= 5:
-                    self.move_towards(self.following_agent.pos)
-                else:
-                    # guide no longer in view, then stop following AND keep moving
-                    self.state = "HELP"
-                    self.following_agent = None
-                    self.do_random_constant_move()
+        # dispatch to the handler for the current state
+        self._handlers[self.state](visible_exits)
+
+    # if state is Evacuating, then move to the closest exist
+    def _step_evacuating(self, visible_exits):
+        if not visible_exits.size:
+            self.state = State.HELP
+            self.following_agent = None
+            self.do_random_constant_move()
+            return
+        exit_pos = tuple(self.model.exit_xy[self.closest_exit(visible_exits)])
+        moved = self.move_towards(exit_pos)
+
+        # If direct path is blocked, try the best free step towards exit
+        if not moved:
+            target_cell = self.best_free_step_towards_exit(exit_pos)
+            if target_cell:
+                self.model.move_agent_to(self, target_cell)
+                self.check_exit()
+
+    # If following someone, compute distance to them
+    # if within 5 cells, move toward them
+    # if too far, give up and revert to HELP
+    def _step_following(self, visible_exits):
+        if self.following_agent and self.following_agent.pos:
+            dist = abs(self.following_agent.pos[0] - self.pos[0]) + abs(self.following_agent.pos[1] - self.pos[1])
+
+            if dist <= 5:
+                self.move_towards(self.following_agent.pos)
             else:
-                # guide disappeared for some reason
-                self.state = "HELP"
+                # guide no longer in view, then stop following AND keep moving
+                self.state = State.HELP
                 self.following_agent = None
                 self.do_random_constant_move()
+        else:
+            # guide disappeared for some reason
+            self.state = State.HELP
+            self.following_agent = None
+            self.do_random_constant_move()
 
-        # if state is help, try to find a guide by asking neighbors
-        elif self.state == "HELP":
-            guide = self.ask_neighbors()
-            # if we found a guide, remember who it is and store follow start time
-            if guide:
-                self.state = "FOLLOWING"
-                self.following_agent = guide
-                self.follow_start_step = self.model.step_count
-
-                # move immediately toward guide
-                self.move_towards(guide.pos)
-            else:
-                self.do_random_constant_move()
+    # if state is help, try to find a guide by asking neighbors
+    def _step_help(self, visible_exits):
+        guide = self.ask_neighbors()
+        # if we found a guide, remember who it is and store follow start time
+        if guide:
+            self.state = State.FOLLOWING
+            self.following_agent = guide
+            self.follow_start_step = self.model.step_count
+
+            # move immediately toward guide
+            self.move_towards(guide.pos)
+        else:
+            self.do_random_constant_move()
 
 
 class GridModel(mesa.Model):
@@ -264,8 +359,16 @@ class GridModel(mesa.Model):
         self.grid = mesa.space.MultiGrid(grid_size, grid_size, torus=False)
         self.emergency = False
         self.start_time = time.time()
+        # wall-clock timestamp refreshed once per step; agents read this
+        # instead of calling time.time() themselves
+        self.now = self.start_time
         self.evac_start_time = 0
         self.active_agents = []
+        # set mirror of active_agents for O(1) membership tests; the list is
+        # kept for deterministic iteration order
+        self.active_agents_set = set()
+        # agents that exited during the current tick, pruned after the loop
+        self.to_remove = []
         self.monitor = MonitorAgent(self, emergency_time)
         self.running = True
         self.exits = []
@@ -277,23 +380,83 @@ class GridModel(mesa.Model):
         if exit_positions is None:
             exit_positions = [(0, 0), (grid_size - 1, grid_size - 1)]
 
+        # per-cell agent counts and exit-cell flags, kept in sync with the grid
+        # so the JIT kernels can test cells without touching Mesa's structures
+        self.occupancy = np.zeros((grid_size, grid_size), dtype=np.int8)
+        self.exit_mask = np.zeros((grid_size, grid_size), dtype=np.bool_)
+        # cell -> evac agent for neighbor queries; movement only ever enters
+        # empty cells, so a cell holds at most one evac agent
+        self.evac_positions = {}
+
         for pos in exit_positions:
             exit_agent = ExitAgent(self)
             self.grid.place_agent(exit_agent, pos)
+            self.occupancy[pos] += 1
+            self.exit_mask[pos] = True
             self.exits.append(exit_agent)
 
-        # Create evac agents
-        for _ in range(NUM_AGENTS):
-            empty_cells = [
-                (x, y)
-                for (cell_content, (x, y)) in self.grid.coord_iter()
-                if len(cell_content) == 0
-            ]
-            if empty_cells:
-                init_pos = self.random.choice(empty_cells)
-                agent = EvacAgent(self)
-                self.grid.place_agent(agent, init_pos)
-                self.active_agents.append(agent)
+        # cached exit coordinates so agents can query visibility/distance on an array
+        self.exit_xy = np.array([e.pos for e in self.exits], dtype=np.int32)
+        # frozenset of exit cells for O(1) membership tests in the move/exit checks
+        self.exit_positions = frozenset(exit_positions)
+
+        # Create evac agents: build the free-cell list once and draw all start
+        # positions without replacement, instead of rescanning the whole grid
+        # for every agent placed
+        free_cells = [
+            (x, y)
+            for x in range(grid_size)
+            for y in range(grid_size)
+            if (x, y) not in self.exit_positions
+        ]
+        start_cells = self.random.sample(free_cells, min(NUM_AGENTS, len(free_cells)))
+
+        # hot per-agent state as structure-of-arrays: row i belongs to the
+        # agent with idx i; exited agents keep (-1, -1) as position
+        self.agents_xy = np.full((len(start_cells), 2), -1, dtype=np.int16)
+        self.agent_state = np.zeros(len(start_cells), dtype=np.int8)
+
+        for i, init_pos in enumerate(start_cells):
+            agent = EvacAgent(self, i)
+            self.grid.place_agent(agent, init_pos)
+            self.agents_xy[i] = init_pos
+            self.occupancy[init_pos] += 1
+            self.evac_positions[init_pos] = agent
+            self.active_agents.append(agent)
+            self.active_agents_set.add(agent)
+
+    # all moves/removals go through these helpers so the occupancy grid, the
+    # cell index and the agents_xy rows stay in sync
+    def move_agent_to(self, agent, pos):
+        old_pos = agent.pos
+        self.occupancy[old_pos] -= 1
+        del self.evac_positions[old_pos]
+        self.grid.move_agent(agent, pos)
+        self.occupancy[pos] += 1
+        self.evac_positions[pos] = agent
+        self.agents_xy[agent.idx] = pos
+
+    def remove_from_grid(self, agent):
+        pos = agent.pos
+        self.occupancy[pos] -= 1
+        del self.evac_positions[pos]
+        self.grid.remove_agent(agent)
+        self.agents_xy[agent.idx] = -1
+
+    # before the emergency every agent does a plain random step, so draw all
+    # directions with one rng call and vector-mask the candidates; occupancy is
+    # rechecked while applying so two agents can't land on the same cell
+    def pre_emergency_random_walk(self):
+        choices = self.rng.integers(0, 4, size=self.agents_xy.shape[0])
+        candidates = self.agents_xy + DIRS_ARR[choices]
+        in_bounds = (
+            (candidates[:, 0] >= 0) & (candidates[:, 0] < self.grid.width)
+            & (candidates[:, 1] >= 0) & (candidates[:, 1] < self.grid.height)
+        )
+        for i in np.flatnonzero(in_bounds):
+            pos = (int(candidates[i, 0]), int(candidates[i, 1]))
+            if self.occupancy[pos] == 0:
+                self.move_agent_to(self.active_agents[i], pos)
 
     def get_evacuation_steps(self):
         if self.evac_start_step is None or self.evac_end_step is None:
@@ -302,15 +465,28 @@ class GridModel(mesa.Model):
 
     def step(self):
         self.step_count += 1
+        self.now = time.time()
         # Monitor checks if 10 seconds passed to give the alarm
         self.monitor.step()
 
         if self.emergency and self.evac_start_step is None:
             self.evac_start_step  = self.step_count
 
-        for agent in list(self.active_agents):
+        if not self.emergency:
+            # before emergency = random walking, batched for all agents
+            self.pre_emergency_random_walk()
+            return
+
+        # exited agents land in to_remove instead of mutating the list here,
+        # so iterate in place without cloning it every tick
+        for agent in self.active_agents:
             agent.step()
 
+        if self.to_remove:
+            for agent in self.to_remove:
+                self.active_agents.remove(agent)
+            self.to_remove.clear()
+
         if self.emergency and len(self.active_agents) == 0:
             self.running = False
             self.evac_end_step = self.step_count
@@ -325,10 +501,10 @@ def agent_portrayal(agent):
         }
     if isinstance(agent, EvacAgent):
         color = "blue"
-        if agent.emergency_triggered:
-            if agent.state == "FOLLOWING":
+        if agent.model.emergency:
+            if agent.state == State.FOLLOWING:
                 color = "yellow"
-            elif agent.state == "EVACUATING":
+            elif agent.state == State.EVACUATING:
                 color = "red"
             else:
                 color = "orange"
@@ -341,6 +517,7 @@ def agent_portrayal(agent):
     return {}
 
 if __name__ == "__main__":
+    from mesa.visualization import SolaraViz, make_space_component
 
     model_params = {
         "grid_size": {